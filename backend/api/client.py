@@ -1,34 +1,140 @@
 import requests
 import json
-from typing import List, Dict, Optional
-from ..core.config import MEALDB_API_BASE_URL
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Callable, List, Dict, Optional
+from ..core.config import MEALDB_API_BASE_URL, MEALDB_MAX_WORKERS, MEALDB_CACHE_DIR
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Number of concurrent requests used for batch fetches
+MAX_WORKERS = max(1, MEALDB_MAX_WORKERS)
+
+# Connection pool size per host, leaving headroom above MAX_WORKERS so no
+# worker ever has its connection discarded and pays a new TLS handshake
+POOL_SIZE = MAX_WORKERS * 2
+
+# Lookup cache for endpoints whose data rarely changes
+CACHE_TTL = 3600
+CACHE_MAX_ENTRIES = 256
+
+# On-disk cache for lists that change rarely, shared across script runs
+DISK_CACHE_DIR = os.path.expanduser(MEALDB_CACHE_DIR)
+DISK_CACHE_TTL = 86400
+
+# Splits the comma-separated strTags field, swallowing surrounding whitespace
+_TAG_SPLIT = re.compile(r'\s*,\s*')
+
+def _parse_json(content: bytes):
+    """Decode a JSON payload, using orjson when it is installed"""
+    return orjson.loads(content) if orjson else json.loads(content)
+
+def _is_null(value: str) -> bool:
+    """Check for the literal 'null' placeholder the API uses for empty slots"""
+    return len(value) == 4 and value.lower() == 'null'
 
 class TheMealDBClient:
+    # Field names for the 20 ingredient/measure slots of a meal record
+    _INGREDIENT_KEYS = tuple(f'strIngredient{i}' for i in range(1, 21))
+    _MEASURE_KEYS = tuple(f'strMeasure{i}' for i in range(1, 21))
+    
     def __init__(self):
         self.base_url = MEALDB_API_BASE_URL
         self.session = requests.Session()
+        # Pool keep-alive connections for parallel requests and retry transient failures
+        retry = Retry(
+            total=3,
+            backoff_factor=0.2,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(['GET'])
+        )
+        adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retry)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self._cache = {}
+        self._cache_lock = threading.Lock()
+    
+    def _get_cached_json(self, path: str, params: Optional[Dict] = None) -> Dict:
+        """GET a JSON endpoint, serving repeated calls from an in-memory TTL cache"""
+        key = (path, tuple(sorted(params.items())) if params else ())
+        now = time.monotonic()
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached and now - cached[0] < CACHE_TTL:
+                return cached[1]
+        
+        response = self.session.get(f"{self.base_url}/{path}", params=params)
+        response.raise_for_status()
+        data = _parse_json(response.content)
+        
+        with self._cache_lock:
+            self._cache.pop(key, None)
+            if len(self._cache) >= CACHE_MAX_ENTRIES:
+                # Evict the oldest entry (dicts keep insertion order)
+                self._cache.pop(next(iter(self._cache)))
+            self._cache[key] = (now, data)
+        return data
+    
+    def _get_disk_cached_json(self, path: str, params: Optional[Dict], cache_name: str) -> Dict:
+        """GET a JSON endpoint, reusing the copy saved under DISK_CACHE_DIR while it is fresh"""
+        cache_path = os.path.join(DISK_CACHE_DIR, cache_name)
+        try:
+            if time.time() - os.stat(cache_path).st_mtime < DISK_CACHE_TTL:
+                with open(cache_path, 'rb') as cache_file:
+                    return _parse_json(cache_file.read())
+        except (OSError, ValueError):
+            pass
+        
+        data = self._get_cached_json(path, params)
+        try:
+            os.makedirs(DISK_CACHE_DIR, exist_ok=True)
+            # Write to a temporary file first so readers never see a partial file
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as cache_file:
+                json.dump(data, cache_file)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            print(f"Write disk cache failed: {e}")
+        return data
+    
+    def _fetch_random_meal(self) -> Optional[Dict]:
+        """Fetch a single random meal, returning None on failure"""
+        try:
+            response = self.session.get(f"{self.base_url}/random.php", timeout=10)
+            response.raise_for_status()
+            data = _parse_json(response.content)
+            if data.get('meals') and data['meals'][0]:
+                return data['meals'][0]
+        except Exception as e:
+            print(f"Get random meals failed: {e}")
+        return None
+    
+    def _map_concurrently(self, func: Callable, items: List) -> List:
+        """Apply func to every item concurrently, preserving input order"""
+        if not items:
+            return []
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(items))) as executor:
+            return list(executor.map(func, items))
     
     def get_random_meals(self, count: int = 1) -> List[Dict]:
-        """Get random meals using /random.php"""
-        meals = []
-        for _ in range(count):
-            try:
-                response = self.session.get(f"{self.base_url}/random.php")
-                response.raise_for_status()
-                data = response.json()
-                if data.get('meals') and data['meals'][0]:
-                    meals.append(data['meals'][0])
-            except Exception as e:
-                print(f"Get random meals failed: {e}")
-                continue
-        return meals
+        """Get random meals using /random.php, issuing the requests concurrently"""
+        results = self._map_concurrently(lambda _: self._fetch_random_meal(), list(range(max(count, 0))))
+        return [meal for meal in results if meal]
     
     def search_by_name(self, name: str) -> List[Dict]:
         """Search meals by name using /search.php?s=name"""
         try:
             response = self.session.get(f"{self.base_url}/search.php", params={'s': name})
             response.raise_for_status()
-            data = response.json()
+            data = _parse_json(response.content)
             return data.get('meals', [])
         except Exception as e:
             print(f"Search by name failed: {e}")
@@ -37,9 +143,7 @@ class TheMealDBClient:
     def search_by_first_letter(self, letter: str) -> List[Dict]:
         """List all meals by first letter using /search.php?f=letter"""
         try:
-            response = self.session.get(f"{self.base_url}/search.php", params={'f': letter})
-            response.raise_for_status()
-            data = response.json()
+            data = self._get_cached_json('search.php', params={'f': letter})
             return data.get('meals', [])
         except Exception as e:
             print(f"Search by first letter failed: {e}")
@@ -50,7 +154,7 @@ class TheMealDBClient:
         try:
             response = self.session.get(f"{self.base_url}/filter.php", params={'i': ingredient})
             response.raise_for_status()
-            data = response.json()
+            data = _parse_json(response.content)
             return data.get('meals', [])
         except Exception as e:
             print(f"Search by ingredient failed: {e}")
@@ -59,32 +163,36 @@ class TheMealDBClient:
     def search_by_category(self, category: str) -> List[Dict]:
         """Search meals by category using /filter.php?c=category"""
         try:
-            response = self.session.get(f"{self.base_url}/filter.php", params={'c': category})
-            response.raise_for_status()
-            data = response.json()
+            data = self._get_cached_json('filter.php', params={'c': category})
             return data.get('meals', [])
         except Exception as e:
             print(f"Search by category failed: {e}")
             return []
     
+    def search_by_categories(self, categories: List[str]) -> Dict[str, List[Dict]]:
+        """Search meals for several categories at once, keyed by category"""
+        results = self._map_concurrently(self.search_by_category, categories)
+        return dict(zip(categories, results))
+    
     def get_meal_by_id(self, meal_id: str) -> Optional[Dict]:
         """Lookup full meal details by id using /lookup.php?i=id"""
         try:
-            response = self.session.get(f"{self.base_url}/lookup.php", params={'i': meal_id})
-            response.raise_for_status()
-            data = response.json()
+            data = self._get_cached_json('lookup.php', params={'i': meal_id})
             meals = data.get('meals', [])
             return meals[0] if meals else None
         except Exception as e:
             print(f"Get meal by ID failed: {e}")
             return None
     
+    def get_meals_by_ids(self, meal_ids: List[str]) -> List[Dict]:
+        """Lookup full details for several meals at once, dropping failed lookups"""
+        results = self._map_concurrently(self.get_meal_by_id, meal_ids)
+        return [meal for meal in results if meal]
+    
     def get_categories(self) -> List[Dict]:
         """Get all categories using /categories.php"""
         try:
-            response = self.session.get(f"{self.base_url}/categories.php")
-            response.raise_for_status()
-            data = response.json()
+            data = self._get_disk_cached_json('categories.php', None, 'categories.json')
             return data.get('categories', [])
         except Exception as e:
             print(f"Get categories failed: {e}")
@@ -93,9 +201,7 @@ class TheMealDBClient:
     def get_ingredients(self) -> List[Dict]:
         """Get all ingredients using /list.php?i=list"""
         try:
-            response = self.session.get(f"{self.base_url}/list.php", params={'i': 'list'})
-            response.raise_for_status()
-            data = response.json()
+            data = self._get_cached_json('list.php', params={'i': 'list'})
             return data.get('meals', [])
         except Exception as e:
             print(f"Get ingredients failed: {e}")
@@ -104,9 +210,7 @@ class TheMealDBClient:
     def get_areas(self) -> List[Dict]:
         """Get all areas/cuisines using /list.php?a=list"""
         try:
-            response = self.session.get(f"{self.base_url}/list.php", params={'a': 'list'})
-            response.raise_for_status()
-            data = response.json()
+            data = self._get_disk_cached_json('list.php', {'a': 'list'}, 'areas.json')
             return data.get('meals', [])
         except Exception as e:
             print(f"Get areas failed: {e}")
@@ -115,9 +219,7 @@ class TheMealDBClient:
     def get_categories_list(self) -> List[Dict]:
         """Get all categories using /list.php?c=list"""
         try:
-            response = self.session.get(f"{self.base_url}/list.php", params={'c': 'list'})
-            response.raise_for_status()
-            data = response.json()
+            data = self._get_cached_json('list.php', params={'c': 'list'})
             return data.get('meals', [])
         except Exception as e:
             print(f"Get categories list failed: {e}")
@@ -126,39 +228,35 @@ class TheMealDBClient:
     def search_by_area(self, area: str) -> List[Dict]:
         """Search meals by area/cuisine using /filter.php?a=area"""
         try:
-            response = self.session.get(f"{self.base_url}/filter.php", params={'a': area})
-            response.raise_for_status()
-            data = response.json()
+            data = self._get_cached_json('filter.php', params={'a': area})
             return data.get('meals', [])
         except Exception as e:
             print(f"Search by area failed: {e}")
             return []
     
+    def search_by_areas(self, areas: List[str]) -> Dict[str, List[Dict]]:
+        """Search meals for several areas at once, keyed by area"""
+        results = self._map_concurrently(self.search_by_area, areas)
+        return dict(zip(areas, results))
+    
     def parse_meal_data(self, meal: Dict) -> Dict:
         """Parse meal data and extract ingredients and measures"""
         ingredients = []
         measures = []
         
         # Extract ingredients and measures (up to 20)
-        for i in range(1, 21):
-            ingredient_key = f'strIngredient{i}'
-            measure_key = f'strMeasure{i}'
-            
-            ingredient = meal.get(ingredient_key, '') or ''
-            measure = meal.get(measure_key, '') or ''
-            
-            ingredient = ingredient.strip() if ingredient else ''
-            measure = measure.strip() if measure else ''
+        for ingredient_key, measure_key in zip(self._INGREDIENT_KEYS, self._MEASURE_KEYS):
+            ingredient = (meal.get(ingredient_key) or '').strip()
+            if not ingredient or _is_null(ingredient):
+                continue
             
-            if ingredient and ingredient.lower() != 'null':
-                ingredients.append(ingredient)
-                measures.append(measure if measure and measure.lower() != 'null' else '')
+            measure = (meal.get(measure_key) or '').strip()
+            ingredients.append(ingredient)
+            measures.append('' if _is_null(measure) else measure)
         
         # Process tags
-        tags = []
         str_tags = meal.get('strTags')
-        if str_tags:
-            tags = [tag.strip() for tag in str_tags.split(',') if tag.strip()]
+        tags = [tag for tag in _TAG_SPLIT.split(str_tags.strip()) if tag] if str_tags else []
         
         return {
             'meal_id': meal.get('idMeal'),
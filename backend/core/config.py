@@ -13,9 +13,23 @@ DB_CONFIG = {
     'password': os.getenv('DB_PASSWORD', 'password')
 }
 
+# Database connection pool configuration
+DB_POOL_CONFIG = {
+    'pool_size': int(os.getenv('DB_POOL_SIZE', '20')),
+    'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', '30')),
+    'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', '1800')),
+    'statement_timeout_ms': int(os.getenv('DB_STATEMENT_TIMEOUT_MS', '5000'))
+}
+
 # TheMealDB API configuration
 MEALDB_API_BASE_URL = os.getenv('MEALDB_API_BASE_URL', 'https://www.themealdb.com/api/json/v1/1')
 
+# Concurrent requests used for batch API fetches; each keeps its own keep-alive connection
+MEALDB_MAX_WORKERS = int(os.getenv('MEALDB_MAX_WORKERS', '16'))
+
+# Directory for API lists cached between runs (categories, areas)
+MEALDB_CACHE_DIR = os.getenv('MEALDB_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'recipe-shuffle'))
+
 # Streamlit configuration
 STREAMLIT_CONFIG = {
     'page_title': 'Recipe Recommendation System',
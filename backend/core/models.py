@@ -1,12 +1,24 @@
-from sqlalchemy import create_engine, Column, Integer, String, Text, ARRAY, DateTime, Boolean
+from sqlalchemy import create_engine, Column, Integer, String, Text, ARRAY, DateTime, Boolean, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from contextlib import contextmanager
 from datetime import datetime
+from typing import NamedTuple, Optional, Tuple
 import psycopg2
-from .config import DB_CONFIG
+from .config import DB_CONFIG, DB_POOL_CONFIG
 
 Base = declarative_base()
 
+# Trigram GIN indexes let the ILIKE '%query%' searches use an index instead of a sequential scan.
+# They need pg_trgm, so they are created separately from the table and skipped when it is missing.
+TRIGRAM_SEARCH_COLUMNS = ('name', 'category', 'area')
+
+# Optional extensions: pg_trgm for the trigram indexes, tsm_system_rows for TABLESAMPLE SYSTEM_ROWS
+OPTIONAL_EXTENSIONS = ('pg_trgm', 'tsm_system_rows')
+
+# Schema changes may take longer than the per-statement timeout applied to regular queries
+DISABLE_STATEMENT_TIMEOUT = text("SET LOCAL statement_timeout = 0")
+
 class Recipe(Base):
     __tablename__ = 'recipes'
     
@@ -25,6 +37,21 @@ class Recipe(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     is_favorite = Column(Boolean, default=False)
 
+class RecipeCard(NamedTuple):
+    """Lightweight read-only recipe summary returned by list views"""
+    id: int
+    meal_id: str
+    name: str
+    category: Optional[str]
+    area: Optional[str]
+    image_url: Optional[str]
+    ingredients: Tuple[str, ...]
+    
+    @classmethod
+    def from_row(cls, row) -> 'RecipeCard':
+        """Build a card from a result row mapping holding the card columns"""
+        return cls(**{**row, 'ingredients': tuple(row['ingredients'] or ())})
+
 class DatabaseManager:
     def __init__(self):
         self.engine = None
@@ -36,17 +63,52 @@ class DatabaseManager:
         try:
             # Build database connection string
             db_url = f"postgresql://{DB_CONFIG['user']}:{DB_CONFIG['password']}@{DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['database']}"
-            self.engine = create_engine(db_url)
-            self.Session = sessionmaker(bind=self.engine)
+            self.engine = create_engine(
+                db_url,
+                pool_size=DB_POOL_CONFIG['pool_size'],
+                max_overflow=DB_POOL_CONFIG['max_overflow'],
+                pool_pre_ping=True,  # Replace stale connections instead of failing the request
+                pool_recycle=DB_POOL_CONFIG['pool_recycle'],
+                connect_args={'options': f"-c statement_timeout={DB_POOL_CONFIG['statement_timeout_ms']}"}
+            )
+            # Loaded objects stay usable after commit/close; flushes happen only on commit
+            self.Session = sessionmaker(bind=self.engine, expire_on_commit=False, autoflush=False)
             print("Database connection successful!")
         except Exception as e:
             print(f"Database connection failed: {e}")
             raise e
     
+    def create_extensions(self):
+        """Create the optional PostgreSQL extensions used by indexes and queries"""
+        for extension in OPTIONAL_EXTENSIONS:
+            try:
+                with self.engine.begin() as conn:
+                    conn.execute(DISABLE_STATEMENT_TIMEOUT)
+                    conn.execute(text(f"CREATE EXTENSION IF NOT EXISTS {extension}"))
+            except Exception as e:
+                print(f"Optional extension {extension} unavailable: {e}")
+    
+    def create_trigram_indexes(self):
+        """Create the trigram search indexes when pg_trgm is installed"""
+        for column in TRIGRAM_SEARCH_COLUMNS:
+            try:
+                with self.engine.begin() as conn:
+                    conn.execute(DISABLE_STATEMENT_TIMEOUT)
+                    conn.execute(text(
+                        f"CREATE INDEX IF NOT EXISTS ix_recipes_{column}_trgm "
+                        f"ON recipes USING gin ({column} gin_trgm_ops)"
+                    ))
+            except Exception as e:
+                print(f"Trigram index on {column} unavailable: {e}")
+    
     def create_tables(self):
         """Create database tables"""
         try:
-            Base.metadata.create_all(self.engine)
+            self.create_extensions()
+            with self.engine.begin() as conn:
+                conn.execute(DISABLE_STATEMENT_TIMEOUT)
+                Base.metadata.create_all(conn)
+            self.create_trigram_indexes()
             print("Database tables created successfully!")
         except Exception as e:
             print(f"Failed to create database tables: {e}")
@@ -60,6 +122,20 @@ class DatabaseManager:
         """Close database session"""
         session.close()
     
+    @contextmanager
+    def session_scope(self, commit: bool = False):
+        """Provide a session that is rolled back on error and always closed"""
+        session = self.Session()
+        try:
+            yield session
+            if commit:
+                session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+    
     def test_connection(self):
         """Test database connection"""
         try:
@@ -1,17 +1,73 @@
-from ..core.models import db_manager, Recipe
+from ..core.models import db_manager, Recipe, RecipeCard
 from ..api.client import api_client
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Set, Tuple
 import logging
-from sqlalchemy import func
+import math
+import random
+from sqlalchemy import func, or_, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Recipe columns populated from parsed API data
+RECIPE_FIELDS = (
+    'meal_id', 'name', 'category', 'area', 'instructions',
+    'image_url', 'youtube_url', 'ingredients', 'measures', 'tags'
+)
+
+# Number of meals inserted and committed per transaction during sync
+SYNC_BATCH_SIZE = 10
+
+# Columns needed to render a recipe card; list views skip the large instructions text
+CARD_COLUMN_NAMES = RecipeCard._fields
+
+# Card column list for raw SQL statements selecting from "recipes r"
+CARD_SQL_COLUMNS = ', '.join(f'r.{name}' for name in CARD_COLUMN_NAMES)
+
+# Random selection via the tsm_system_rows extension: reads only sample_size rows
+RANDOM_SAMPLE_SQL = text(
+    f"SELECT {CARD_SQL_COLUMNS} FROM recipes r "
+    "TABLESAMPLE SYSTEM_ROWS(:sample_size) ORDER BY random() LIMIT :limit"
+)
+
 class RecipeDataService:
     def __init__(self):
         self.db = db_manager
         self.api = api_client
+        self._has_system_rows = None
+    
+    def card_select(self):
+        """Select only the columns shown on recipe cards"""
+        return select(*(getattr(Recipe, name) for name in CARD_COLUMN_NAMES))
+    
+    def fetch_cards(self, session, statement, params: Optional[Dict] = None) -> List[RecipeCard]:
+        """Execute a statement selecting the card columns and return plain RecipeCard rows"""
+        return [RecipeCard.from_row(row) for row in session.execute(statement, params).mappings()]
+    
+    def _insert_new_recipes(self, session, parsed_meals: List[Dict]) -> int:
+        """Insert parsed meals in one statement, letting the meal_id unique index skip duplicates"""
+        if not parsed_meals:
+            return 0
+        rows = [{field: parsed_meal[field] for field in RECIPE_FIELDS} for parsed_meal in parsed_meals]
+        stmt = pg_insert(Recipe.__table__).values(rows).on_conflict_do_nothing(
+            index_elements=['meal_id']
+        )
+        return session.execute(stmt).rowcount
+    
+    def parse_meals(self, meals: List[Dict]) -> List[Dict]:
+        """Parse API meals for storage, once per meal id"""
+        unique_meals = {}
+        for meal in meals:
+            unique_meals.setdefault(meal.get('idMeal'), meal)
+        return [self.api.parse_meal_data(meal) for meal in unique_meals.values()]
+    
+    def persist_meals(self, session, parsed_meals: List[Dict]) -> Tuple[int, int]:
+        """Insert parsed meals that are not stored yet, returning (added, skipped)"""
+        # No existence pre-check: the meal_id unique index skips stored meals during the insert
+        inserted_count = self._insert_new_recipes(session, parsed_meals)
+        return inserted_count, len(parsed_meals) - inserted_count
     
     def fetch_and_store_random_recipes(self, count: int = 10) -> List[Recipe]:
         """Fetch and store random recipes"""
@@ -19,191 +75,178 @@ class RecipeDataService:
         
         # Get random recipes from API
         meals = self.api.get_random_meals(count)
+        parsed_meals = [self.api.parse_meal_data(meal) for meal in meals]
+        meal_ids = [parsed_meal['meal_id'] for parsed_meal in parsed_meals]
         stored_recipes = []
         
-        session = self.db.get_session()
         try:
-            for meal in meals:
-                # Parse recipe data
-                parsed_meal = self.api.parse_meal_data(meal)
-                
-                # Check if already exists
-                existing_recipe = session.query(Recipe).filter(
-                    Recipe.meal_id == parsed_meal['meal_id']
-                ).first()
-                
-                if existing_recipe:
-                    logger.info(f"Recipe {parsed_meal['name']} already exists, skipping")
-                    stored_recipes.append(existing_recipe)
-                    continue
-                
-                # Create new recipe record
-                recipe = Recipe(
-                    meal_id=parsed_meal['meal_id'],
-                    name=parsed_meal['name'],
-                    category=parsed_meal['category'],
-                    area=parsed_meal['area'],
-                    instructions=parsed_meal['instructions'],
-                    image_url=parsed_meal['image_url'],
-                    youtube_url=parsed_meal['youtube_url'],
-                    ingredients=parsed_meal['ingredients'],
-                    measures=parsed_meal['measures'],
-                    tags=parsed_meal['tags']
-                )
+            with self.db.session_scope(commit=True) as session:
+                inserted_count = self._insert_new_recipes(session, parsed_meals)
                 
-                session.add(recipe)
-                stored_recipes.append(recipe)
-                logger.info(f"Successfully stored recipe: {parsed_meal['name']}")
-            
-            session.commit()
-            logger.info(f"Successfully stored {len(stored_recipes)} recipes")
+                # Load the stored rows, new and pre-existing alike, in API order
+                if meal_ids:
+                    recipes_by_meal_id = {
+                        recipe.meal_id: recipe
+                        for recipe in session.execute(
+                            select(Recipe).where(Recipe.meal_id.in_(meal_ids))
+                        ).scalars()
+                    }
+                    stored_recipes = [
+                        recipes_by_meal_id[meal_id] for meal_id in meal_ids if meal_id in recipes_by_meal_id
+                    ]
+            logger.info(f"Successfully stored {len(stored_recipes)} recipes ({inserted_count} new)")
             
         except Exception as e:
-            session.rollback()
             logger.error(f"Failed to store recipes: {e}")
             raise e
-        finally:
-            self.db.close_session(session)
         
         return stored_recipes
     
-    def search_recipes(self, query: str, search_type: str = 'all') -> List[Recipe]:
-        """Search recipes"""
-        session = self.db.get_session()
-        try:
+    def search_recipes(self, query: str, search_type: str = 'all',
+                       limit: Optional[int] = None) -> List[RecipeCard]:
+        """Search recipes, returning at most limit results when given"""
+        # Build the LIKE patterns once and reuse them across conditions
+        contains = f'%{query}%'
+        contains_lower = f'%{query.lower()}%'
+        ingredients_text = func.array_to_string(Recipe.ingredients, ',')
+        
+        with self.db.session_scope() as session:
             if search_type == 'name':
                 # Search by name
-                recipes = session.query(Recipe).filter(
-                    Recipe.name.ilike(f'%{query}%')
-                ).all()
+                condition = Recipe.name.ilike(contains)
             elif search_type == 'ingredient':
                 # Search by ingredient using array_to_string
-                recipes = session.query(Recipe).filter(
-                    func.array_to_string(Recipe.ingredients, ',').ilike(f'%{query.lower()}%')
-                ).all()
+                condition = ingredients_text.ilike(contains_lower)
             elif search_type == 'category':
                 # Search by category
-                recipes = session.query(Recipe).filter(
-                    Recipe.category.ilike(f'%{query}%')
-                ).all()
+                condition = Recipe.category.ilike(contains)
             elif search_type == 'area':
                 # Search by area/cuisine
-                recipes = session.query(Recipe).filter(
-                    Recipe.area.ilike(f'%{query}%')
-                ).all()
+                condition = Recipe.area.ilike(contains)
             elif search_type == 'first_letter':
                 # Search by first letter
-                recipes = session.query(Recipe).filter(
-                    Recipe.name.ilike(f'{query}%')
-                ).all()
+                condition = Recipe.name.ilike(f'{query}%')
             else:
                 # Comprehensive search
-                recipes = session.query(Recipe).filter(
-                    (Recipe.name.ilike(f'%{query}%')) |
-                    (Recipe.category.ilike(f'%{query}%')) |
-                    (Recipe.area.ilike(f'%{query}%')) |
-                    (func.array_to_string(Recipe.ingredients, ',').ilike(f'%{query.lower()}%'))
-                ).all()
+                condition = or_(
+                    Recipe.name.ilike(contains),
+                    Recipe.category.ilike(contains),
+                    Recipe.area.ilike(contains),
+                    ingredients_text.ilike(contains_lower)
+                )
             
-            return recipes
-        finally:
-            self.db.close_session(session)
+            return self.fetch_cards(session, self.card_select().where(condition).limit(limit))
+    
+    def _supports_system_rows(self, session) -> bool:
+        """Check once whether the tsm_system_rows extension is installed"""
+        if self._has_system_rows is None:
+            self._has_system_rows = bool(session.execute(text(
+                "SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'tsm_system_rows')"
+            )).scalar())
+        return self._has_system_rows
     
-    def get_random_recipes(self, count: int = 5) -> List[Recipe]:
+    def get_random_recipes(self, count: int = 5) -> List[RecipeCard]:
         """Get random recipes"""
-        session = self.db.get_session()
-        try:
-            recipes = session.query(Recipe).order_by(Recipe.id.desc()).limit(count).all()
-            return recipes
-        finally:
-            self.db.close_session(session)
+        with self.db.session_scope() as session:
+            if self._supports_system_rows(session):
+                # Sample a few candidate rows without scanning the table, then shuffle them
+                stmt = RANDOM_SAMPLE_SQL.bindparams(sample_size=count * 4, limit=count)
+                return self.fetch_cards(session, stmt)
+            return self._sample_by_id(session, count)
+    
+    def _sample_by_id(self, session, count: int) -> List[RecipeCard]:
+        """Pick random recipes through primary key lookups instead of sorting the whole table"""
+        max_id, row_count = session.execute(select(func.max(Recipe.id), func.count())).one()
+        if not row_count:
+            return []
+        count = min(count, row_count)
+        
+        # Oversample candidate ids in proportion to the gaps left by deleted rows and skipped inserts
+        sample_size = min(max_id, math.ceil(count * 2 * max_id / row_count))
+        candidate_ids = random.sample(range(1, max_id + 1), sample_size)
+        cards = self.fetch_cards(session, self.card_select().where(Recipe.id.in_(candidate_ids)))
+        random.shuffle(cards)
+        cards = cards[:count]
+        
+        # Rare shortfall: top up with independent lookups of the first row at or after a random id
+        seen_ids = [card.id for card in cards]
+        for _ in range(4 * (count - len(cards))):
+            if len(cards) >= count:
+                break
+            start_id = random.randint(1, max_id)
+            stmt = self.card_select().where(Recipe.id >= start_id, Recipe.id.notin_(seen_ids))
+            for card in self.fetch_cards(session, stmt.order_by(Recipe.id).limit(1)):
+                cards.append(card)
+                seen_ids.append(card.id)
+        return cards
     
     def get_recipe_by_id(self, recipe_id: int) -> Optional[Recipe]:
         """Get recipe by ID"""
-        session = self.db.get_session()
-        try:
-            recipe = session.query(Recipe).filter(Recipe.id == recipe_id).first()
-            return recipe
-        finally:
-            self.db.close_session(session)
+        with self.db.session_scope() as session:
+            return session.execute(
+                select(Recipe).where(Recipe.id == recipe_id)
+            ).scalar_one_or_none()
     
     def get_all_categories(self) -> List[str]:
         """Get all categories"""
-        session = self.db.get_session()
-        try:
-            categories = session.query(Recipe.category).distinct().all()
-            return [cat[0] for cat in categories if cat[0]]
-        finally:
-            self.db.close_session(session)
+        with self.db.session_scope() as session:
+            categories = session.execute(select(Recipe.category).distinct()).scalars()
+            return [category for category in categories if category]
     
     def get_all_ingredients(self) -> List[str]:
         """Get all ingredients"""
-        session = self.db.get_session()
-        try:
-            recipes = session.query(Recipe.ingredients).all()
-            all_ingredients = set()
-            for recipe_ingredients in recipes:
-                if recipe_ingredients[0]:
-                    all_ingredients.update(recipe_ingredients[0])
-            return sorted(list(all_ingredients))
-        finally:
-            self.db.close_session(session)
+        with self.db.session_scope() as session:
+            # Unnest and de-duplicate in the database instead of shipping every array
+            return session.execute(text(
+                "SELECT DISTINCT unnest(ingredients) AS ingredient FROM recipes "
+                "WHERE ingredients IS NOT NULL ORDER BY ingredient"
+            )).scalars().all()
+    
+    def get_stored_meal_ids(self, meal_ids: Optional[List[str]] = None) -> Set[str]:
+        """Get the TheMealDB ids of stored recipes, limited to meal_ids when given"""
+        stmt = select(Recipe.meal_id)
+        if meal_ids is not None:
+            if not meal_ids:
+                return set()
+            stmt = stmt.where(Recipe.meal_id.in_(meal_ids))
+        with self.db.session_scope() as session:
+            return set(session.execute(stmt).scalars())
     
     def get_recipe_count(self) -> int:
         """Get total recipe count"""
-        session = self.db.get_session()
-        try:
-            count = session.query(Recipe).count()
-            return count
-        finally:
-            self.db.close_session(session)
+        with self.db.session_scope() as session:
+            return session.execute(select(func.count()).select_from(Recipe)).scalar_one()
     
     def sync_with_api(self, count: int = 50):
         """Sync data with API"""
         logger.info(f"Starting to sync {count} recipes with TheMealDB API...")
         
-        # Get random recipes
+        # Get random recipes and drop the stored ones in one IN query, so existing meals are
+        # neither re-parsed nor sent to the insert, where each conflict would burn a recipes.id value
         meals = self.api.get_random_meals(count)
+        stored_ids = self.get_stored_meal_ids([meal.get('idMeal') for meal in meals])
+        
+        # Parse before the session opens so it only does database work
+        parsed_meals = self.parse_meals([meal for meal in meals if meal.get('idMeal') not in stored_ids])
+        
         stored_count = 0
-        skipped_count = 0
         
-        session = self.db.get_session()
         try:
-            for meal in meals:
-                parsed_meal = self.api.parse_meal_data(meal)
-                
-                # Check if already exists
-                existing_recipe = session.query(Recipe).filter(
-                    Recipe.meal_id == parsed_meal['meal_id']
-                ).first()
-                
-                if not existing_recipe:
-                    recipe = Recipe(
-                        meal_id=parsed_meal['meal_id'],
-                        name=parsed_meal['name'],
-                        category=parsed_meal['category'],
-                        area=parsed_meal['area'],
-                        instructions=parsed_meal['instructions'],
-                        image_url=parsed_meal['image_url'],
-                        youtube_url=parsed_meal['youtube_url'],
-                        ingredients=parsed_meal['ingredients'],
-                        measures=parsed_meal['measures'],
-                        tags=parsed_meal['tags']
+            with self.db.session_scope() as session:
+                # Commit in small batches so a late failure keeps earlier progress
+                for start in range(0, len(parsed_meals), SYNC_BATCH_SIZE):
+                    inserted_count, _ = self.persist_meals(
+                        session, parsed_meals[start:start + SYNC_BATCH_SIZE]
                     )
-                    session.add(recipe)
-                    stored_count += 1
-                else:
-                    skipped_count += 1
-            
-            session.commit()
+                    session.commit()
+                    stored_count += inserted_count
+            # Random picks repeated within this run count as skipped too
+            skipped_count = len(meals) - stored_count
             logger.info(f"Sync completed: {stored_count} new recipes added, {skipped_count} already existed")
             
         except Exception as e:
-            session.rollback()
             logger.error(f"Sync failed: {e}")
             raise e
-        finally:
-            self.db.close_session(session)
         
         return stored_count, skipped_count
 
@@ -1,17 +1,63 @@
 import random
-from typing import List, Dict, Tuple
-from .data_service import data_service
-from ..core.models import Recipe
+from itertools import chain
+from typing import Iterable, List, Dict, Tuple
+from .data_service import data_service, CARD_SQL_COLUMNS
+from ..core.models import Recipe, RecipeCard
+from sqlalchemy import text
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Ranks recipes by how many of the requested ingredient patterns appear in their ingredient list
+INGREDIENT_MATCH_SQL = text(f"""
+    SELECT {CARD_SQL_COLUMNS}
+    FROM recipes r
+    CROSS JOIN LATERAL (
+        SELECT count(*) AS score
+        FROM unnest(CAST(:patterns AS text[])) AS wanted(pattern)
+        WHERE EXISTS (
+            SELECT 1 FROM unnest(r.ingredients) AS ing(name)
+            WHERE ing.name ILIKE wanted.pattern
+        )
+    ) m
+    WHERE m.score > 0
+    ORDER BY m.score DESC
+    LIMIT :limit
+""")
+
+# Scores recipes sharing a category or area: category +2, area +1, each common ingredient +0.5
+SIMILAR_RECIPES_SQL = text(f"""
+    SELECT {CARD_SQL_COLUMNS}
+    FROM recipes r
+    WHERE r.id != :recipe_id
+      AND (r.category = :category OR r.area = :area)
+    ORDER BY
+        (CASE WHEN r.category = :category THEN 2 ELSE 0 END)
+        + (CASE WHEN r.area = :area THEN 1 ELSE 0 END)
+        + 0.5 * cardinality(ARRAY(
+            SELECT unnest(r.ingredients)
+            INTERSECT
+            SELECT unnest(CAST(:ingredients AS text[]))
+        )) DESC
+    LIMIT :limit
+""")
+
+def _unique_by_id(recipes: Iterable[RecipeCard], limit: int) -> List[RecipeCard]:
+    """Keep the first occurrence of each recipe, stopping once limit recipes are collected"""
+    unique = {}
+    for recipe in recipes:
+        if recipe.id not in unique:
+            unique[recipe.id] = recipe
+            if len(unique) >= limit:
+                break
+    return list(unique.values())
+
 class RecommendationEngine:
     def __init__(self):
         self.data_service = data_service
     
     def search_and_recommend(self, query: str, search_type: str = 'all', 
-                           num_results: int = 6, include_random: bool = True) -> List[Recipe]:
+                           num_results: int = 6, include_random: bool = True) -> List[RecipeCard]:
         """
         Search and recommend recipes
         Args:
@@ -22,123 +68,70 @@ class RecommendationEngine:
         """
         logger.info(f"Searching recipes: '{query}', type: {search_type}, count: {num_results}")
         
-        # Execute search
-        search_results = self.data_service.search_recipes(query, search_type)
+        # Execute search, fetching no more rows than will be returned
+        search_results = self.data_service.search_recipes(query, search_type, limit=num_results)
         
         # If search results are insufficient, add random recommendations
         if len(search_results) < num_results and include_random:
             random_count = num_results - len(search_results)
             random_recipes = self.data_service.get_random_recipes(random_count)
-            
-            # Avoid duplicates
-            existing_ids = {r.id for r in search_results}
-            additional_recipes = [r for r in random_recipes if r.id not in existing_ids]
-            
-            search_results.extend(additional_recipes[:random_count])
+            return _unique_by_id(chain(search_results, random_recipes), num_results)
         
-        # Limit result count
-        return search_results[:num_results]
+        return search_results
     
     def get_ingredient_based_recommendations(self, ingredients: List[str], 
-                                           num_results: int = 6) -> List[Recipe]:
+                                           num_results: int = 6) -> List[RecipeCard]:
         """Get recommendations based on ingredients"""
         logger.info(f"Getting ingredient-based recommendations: {ingredients}")
         
-        recommendations = []
-        session = self.data_service.db.get_session()
+        if not ingredients:
+            return []
         
-        try:
-            # Search for recipes related to each ingredient
-            for ingredient in ingredients:
-                recipes = session.query(Recipe).filter(
-                    Recipe.ingredients.any(lambda x: ingredient.lower() in x.lower())
-                ).all()
-                recommendations.extend(recipes)
-            
-            # Remove duplicates and sort by match score
-            unique_recipes = {}
-            for recipe in recommendations:
-                if recipe.id not in unique_recipes:
-                    # Calculate match score (number of matching ingredients)
-                    match_count = sum(1 for ing in ingredients 
-                                    if any(ing.lower() in r_ing.lower() 
-                                          for r_ing in recipe.ingredients))
-                    unique_recipes[recipe.id] = (recipe, match_count)
-            
-            # Sort by match score
-            sorted_recipes = sorted(unique_recipes.values(), 
-                                  key=lambda x: x[1], reverse=True)
-            
-            return [recipe for recipe, _ in sorted_recipes[:num_results]]
-            
-        finally:
-            self.data_service.db.close_session(session)
+        with self.data_service.db.session_scope() as session:
+            # Match, score and rank in a single query; score is the number of matching ingredients
+            patterns = [f'%{ingredient}%' for ingredient in ingredients]
+            return self.data_service.fetch_cards(
+                session, INGREDIENT_MATCH_SQL, {'patterns': patterns, 'limit': num_results}
+            )
     
-    def get_category_recommendations(self, category: str, num_results: int = 6) -> List[Recipe]:
+    def get_category_recommendations(self, category: str, num_results: int = 6) -> List[RecipeCard]:
         """Get recommendations based on category"""
         logger.info(f"Getting category-based recommendations: {category}")
-        return self.data_service.search_recipes(category, 'category')[:num_results]
+        return self.data_service.search_recipes(category, 'category', limit=num_results)
     
-    def get_random_recommendations(self, num_results: int = 6) -> List[Recipe]:
+    def get_random_recommendations(self, num_results: int = 6) -> List[RecipeCard]:
         """Get random recommendations"""
         logger.info(f"Getting random recommendations for {num_results} recipes")
         return self.data_service.get_random_recipes(num_results)
     
-    def get_trending_recipes(self, num_results: int = 6) -> List[Recipe]:
+    def get_trending_recipes(self, num_results: int = 6) -> List[RecipeCard]:
         """Get trending recipes (based on recently added)"""
         logger.info(f"Getting trending recipes for {num_results} recipes")
-        session = self.data_service.db.get_session()
-        
-        try:
-            recipes = session.query(Recipe).order_by(
-                Recipe.created_at.desc()
-            ).limit(num_results).all()
-            return recipes
-        finally:
-            self.data_service.db.close_session(session)
+        with self.data_service.db.session_scope() as session:
+            return self.data_service.fetch_cards(
+                session, self.data_service.card_select().order_by(Recipe.created_at.desc()).limit(num_results)
+            )
     
-    def get_similar_recipes(self, recipe: Recipe, num_results: int = 6) -> List[Recipe]:
+    def get_similar_recipes(self, recipe: Recipe, num_results: int = 6) -> List[RecipeCard]:
         """Get similar recipes"""
         logger.info(f"Getting similar recipes to '{recipe.name}'")
         
-        session = self.data_service.db.get_session()
-        
-        try:
-            # Similarity based on category and ingredients
-            similar_recipes = session.query(Recipe).filter(
-                (Recipe.category == recipe.category) |
-                (Recipe.area == recipe.area)
-            ).filter(Recipe.id != recipe.id).all()
-            
-            # Calculate similarity score
-            scored_recipes = []
-            for similar_recipe in similar_recipes:
-                score = 0
-                
-                # Category match
-                if similar_recipe.category == recipe.category:
-                    score += 2
-                
-                # Area match
-                if similar_recipe.area == recipe.area:
-                    score += 1
-                
-                # Ingredient match
-                common_ingredients = set(recipe.ingredients) & set(similar_recipe.ingredients)
-                score += len(common_ingredients) * 0.5
-                
-                scored_recipes.append((similar_recipe, score))
-            
-            # Sort by score
-            scored_recipes.sort(key=lambda x: x[1], reverse=True)
-            
-            return [recipe for recipe, _ in scored_recipes[:num_results]]
-            
-        finally:
-            self.data_service.db.close_session(session)
+        with self.data_service.db.session_scope() as session:
+            # Similarity based on category, area and shared ingredients, scored in the database
+            return self.data_service.fetch_cards(
+                session,
+                SIMILAR_RECIPES_SQL,
+                {
+                    'recipe_id': recipe.id,
+                    'category': recipe.category,
+                    'area': recipe.area,
+                    'ingredients': list(recipe.ingredients or []),
+                    'limit': num_results
+                }
+            )
     
     def get_personalized_recommendations(self, user_preferences: Dict, 
-                                       num_results: int = 6) -> List[Recipe]:
+                                       num_results: int = 6) -> List[RecipeCard]:
         """Get personalized recommendations"""
         logger.info("Generating personalized recommendations")
         
@@ -164,16 +157,7 @@ class RecommendationEngine:
             recommendations.extend(random_recipes)
         
         # Remove duplicates and limit count
-        unique_recipes = []
-        seen_ids = set()
-        for recipe in recommendations:
-            if recipe.id not in seen_ids:
-                unique_recipes.append(recipe)
-                seen_ids.add(recipe.id)
-                if len(unique_recipes) >= num_results:
-                    break
-        
-        return unique_recipes
+        return _unique_by_id(recommendations, num_results)
 
 # Global recommendation engine instance
 recommendation_engine = RecommendationEngine()
@@ -4,22 +4,20 @@ Recipe Recommendation System - Modern Frontend
 """
 
 import streamlit as st
-import requests
-from PIL import Image
-import io
+import html
 from typing import List
 import logging
 import sys
 import os
 import time
+from urllib.parse import urlencode
 
 # Add backend to path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from backend.core.config import STREAMLIT_CONFIG
-from backend.core.models import db_manager, Recipe
+from backend.core.models import db_manager, Recipe, RecipeCard
 from backend.services.data_service import data_service
-from backend.services.recommendation_service import recommendation_engine
 
 # Set page configuration
 st.set_page_config(
@@ -33,194 +31,120 @@ st.set_page_config(
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Custom CSS for modern styling
-st.markdown("""
-<style>
-    /* Set page background to purple gradient */
-    .main .block-container {
-        padding-top: 2rem;
-        padding-bottom: 2rem;
-        max-width: 1200px;
-    }
-    
-    /* Override Streamlit's default background */
-    .stApp {
-        background-color: white;
-    }
-    
-    .main-header {
-        background: transparent;
-        padding: 2rem;
-        color: #2c3e50;
-        text-align: center;
-        margin-bottom: 2rem;
-    }
-    
-    .recipe-card {
-        background: white;
-        border-radius: 15px;
-        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-        transition: transform 0.3s ease;
-        border: 1px solid #e0e0e0;
-        margin-bottom: 1.5rem;
-        overflow: hidden;
-    }
-    
-    .recipe-card:hover {
-        transform: translateY(-5px);
-        box-shadow: 0 8px 15px rgba(0, 0, 0, 0.2);
-    }
-    
-    .recipe-image {
-        width: 100%;
-        height: 200px;
-        overflow: hidden;
-    }
-    
-    .recipe-content {
-        padding: 1.5rem;
-    }
-    
-    .recipe-title {
-        color: #2c3e50;
-        font-size: 1.4rem;
-        font-weight: 600;
-        margin-bottom: 0.5rem;
-    }
-    
-    .recipe-meta {
-        color: #7f8c8d;
-        font-size: 0.9rem;
-        margin-bottom: 1rem;
-    }
-    
-    .ingredient-tag {
-        background: #ecf0f1;
-        color: #2c3e50;
-        padding: 0.3rem 0.8rem;
-        border-radius: 20px;
-        font-size: 0.8rem;
-        margin: 0.2rem;
-        display: inline-block;
-    }
-    
-    .search-container {
-        background: transparent;
-        padding: 1.5rem;
-        margin-bottom: 2rem;
-    }
-    
-    .stButton > button {
-        background: #000000;
-        color: white;
-        border: none;
-        border-radius: 25px;
-        padding: 0.5rem 1.5rem;
-        font-weight: 600;
-        transition: all 0.3s ease;
-    }
-    
-    .stButton > button:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 4px 8px rgba(0, 0, 0, 0.2);
-    }
-    
-    /* Make the card container relative for absolute positioning */
-    .recipe-card {
-        position: relative;
-    }
-    
-    .welcome-section {
-        background: linear-gradient(135deg, #f8f9fa 0%, #e9ecef 100%);
-        padding: 2rem;
-        border-radius: 15px;
-        margin-bottom: 2rem;
-        text-align: center;
-        border: 1px solid #dee2e6;
-    }
-    
-    .stats-container {
-        display: flex;
-        justify-content: space-around;
-        margin: 1rem 0;
-    }
-    
-    .stat-item {
-        text-align: center;
-        padding: 1rem;
-    }
-    
-    .stat-number {
-        font-size: 2rem;
-        font-weight: bold;
-        color: #2c3e50;
-    }
-    
-    .stat-label {
-        color: #7f8c8d;
-        font-size: 0.9rem;
-    }
-</style>
-""", unsafe_allow_html=True)
+# Cached read-only queries, so widget interactions don't hit the database on every rerun
+@st.cache_data(ttl=300)
+def _cached_recipe_count() -> int:
+    return data_service.get_recipe_count()
 
-def load_image_from_url(url: str) -> Image.Image:
-    """Load image from URL with better error handling"""
-    try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        return Image.open(io.BytesIO(response.content))
-    except Exception as e:
-        logger.error(f"Failed to load image: {e}")
-        return None
+@st.cache_data(ttl=60, show_spinner="Loading featured recipes...")
+def _cached_random_recipes(count: int) -> List[RecipeCard]:
+    return data_service.get_random_recipes(count)
 
-def display_modern_recipe_card(recipe: Recipe, col):
-    """Display simplified recipe card for homepage"""
-    with col:
-        # Create a clickable area using st.columns
-        click_col = st.columns(1)[0]
-        
-        with click_col:
-            # Complete card with image using HTML
-            image_url = recipe.image_url if recipe.image_url and recipe.image_url.strip() else "https://via.placeholder.com/300x200?text=🍽️"
-            
-            st.markdown(f"""
-            <div class="recipe-card" style="cursor: pointer;">
-                <div class="recipe-image">
-                    <img src="{image_url}" style="width: 100%; height: 200px; object-fit: cover; border-radius: 10px 10px 0 0;" onerror="this.src='https://via.placeholder.com/300x200?text=🍽️'">
-                </div>
-                <div class="recipe-content">
-                    <div class="recipe-title">{recipe.name}</div>
-                    <div class="recipe-meta">
-                        {f"🍽️ {recipe.category}" if recipe.category else ""} 
-                        {f"🌍 {recipe.area}" if recipe.area else ""}
-                    </div>
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
-            
-            # Add a clickable button
-            if st.button("View Details", key=f"card_{recipe.id}"):
-                st.session_state.selected_recipe_id = recipe.id
-                st.rerun()
+@st.cache_data(ttl=600, max_entries=256)
+def _cached_recipe(recipe_id: int) -> Recipe:
+    return data_service.get_recipe_by_id(recipe_id)
+
+@st.cache_data(ttl=120, show_spinner="Searching recipes...")
+def _cached_search(query: str, search_type: str, num_results: int) -> List[RecipeCard]:
+    # Deferred so the featured page doesn't pay for importing the recommendation engine
+    from backend.services.recommendation_service import recommendation_engine
+    return recommendation_engine.search_and_recommend(query, search_type, num_results)
+
+@st.cache_resource
+def _init_db() -> None:
+    """Create extensions, tables and indexes once per server process"""
+    db_manager.create_tables()
+    logger.info("Database initialization completed")
+
+# Custom CSS for modern styling; base colors come from the theme in .streamlit/config.toml
+CSS_PATH = os.path.join(os.path.dirname(__file__), 'styles.css')
+
+@st.cache_resource
+def _load_css() -> str:
+    """Read the stylesheet once per process and wrap it in a style tag"""
+    with open(CSS_PATH, encoding='utf-8') as css_file:
+        return f"<style>{css_file.read()}</style>"
+
+# Re-emitted on every full rerun, since Streamlit drops elements a run doesn't produce
+st.markdown(_load_css(), unsafe_allow_html=True)
+
+# Search type labels shown in the UI and the search_type values they map to
+SEARCH_TYPE_MAP = {
+    "All": "all",
+    "Name": "name",
+    "Ingredient": "ingredient",
+    "Category": "category",
+    "Area": "area"
+}
+SEARCH_TYPES = tuple(SEARCH_TYPE_MAP)
+SEARCH_TYPE_INDEX = {label: i for i, label in enumerate(SEARCH_TYPES)}
+
+PLACEHOLDER_IMAGE = "https://via.placeholder.com/300x200?text=🍽️"
+
+def _card_html(recipe: RecipeCard, href: str) -> str:
+    """Build the HTML for a single clickable recipe card"""
+    image_url = recipe.image_url if recipe.image_url and recipe.image_url.strip() else PLACEHOLDER_IMAGE
+    meta = " ".join(part for part in (
+        f"🍽️ {html.escape(recipe.category)}" if recipe.category else "",
+        f"🌍 {html.escape(recipe.area)}" if recipe.area else ""
+    ) if part)
+    # Kept on one line so markdown doesn't treat indented HTML as a code block
+    return (
+        f'<a class="recipe-card-link" href="{html.escape(href)}" target="_self">'
+        f'<div class="recipe-card">'
+        f'<div class="recipe-image">'
+        f'<img src="{html.escape(image_url)}" decoding="async" style="width: 100%; height: 200px; object-fit: cover; border-radius: 10px 10px 0 0;" onerror="this.src=\'{PLACEHOLDER_IMAGE}\'">'
+        f'</div>'
+        f'<div class="recipe-content">'
+        f'<div class="recipe-title">{html.escape(recipe.name)}</div>'
+        f'<div class="recipe-meta">{meta}</div>'
+        f'</div>'
+        f'</div>'
+        f'</a>'
+    )
+
+def render_recipe_grid(recipes: List[RecipeCard]):
+    """Render all recipe cards as one markdown element; each card links to its detail view"""
+    # Carry the current search in the link, since following it starts a new session
+    search_params = {}
+    if st.session_state.get('saved_search_query'):
+        search_params = {
+            'q': st.session_state.saved_search_query,
+            'type': st.session_state.saved_search_type,
+            'n': st.session_state.saved_num_results
+        }
+    cards = [
+        _card_html(recipe, '?' + urlencode({'recipe_id': recipe.id, **search_params}))
+        for recipe in recipes
+    ]
+    st.markdown(f'<div class="recipe-grid">{"".join(cards)}</div>', unsafe_allow_html=True)
+
+def apply_query_params():
+    """Restore the selected recipe and saved search from the URL once per session"""
+    if st.session_state.get('query_params_applied'):
+        return
+    st.session_state.query_params_applied = True
+    
+    params = st.query_params
+    recipe_id = params.get('recipe_id')
+    if recipe_id and recipe_id.isdecimal():
+        st.session_state.selected_recipe_id = int(recipe_id)
+    
+    query = params.get('q', '').strip()
+    if query:
+        search_type = params.get('type', 'All')
+        num_results = params.get('n', '6')
+        st.session_state.saved_search_query = query
+        st.session_state.saved_search_type = search_type if search_type in SEARCH_TYPE_MAP else 'All'
+        st.session_state.saved_num_results = min(max(int(num_results), 3), 12) if num_results.isdecimal() else 6
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def _split_steps(instructions: str) -> List[str]:
+    """Split recipe instructions into non-empty steps"""
+    return [step.strip() for step in instructions.split('\r\n') if step.strip()]
 
 def display_recipe_detail(recipe: Recipe):
     """Display detailed recipe information on a separate page"""
-    # Add anchor point and force scroll to top
-    st.markdown('<div id="recipe-detail-top"></div>', unsafe_allow_html=True)
-    
-    # Add JavaScript to scroll to the anchor point
-    st.markdown("""
-    <script>
-    setTimeout(function() {
-        const element = document.getElementById('recipe-detail-top');
-        if (element) {
-            element.scrollIntoView({ behavior: 'smooth', block: 'start' });
-        }
-        window.scrollTo(0, 0);
-    }, 50);
-    </script>
-    """, unsafe_allow_html=True)
-    
     # Add a clear page title
     st.markdown("# Recipe Details")
     st.markdown("---")
@@ -228,6 +152,7 @@ def display_recipe_detail(recipe: Recipe):
     # Back button using Streamlit
     if st.button("← Back to Search", key="back_to_search"):
         st.session_state.selected_recipe_id = None
+        st.query_params.pop('recipe_id', None)
         # Keep search state to return to search results
         st.rerun()
     
@@ -256,15 +181,14 @@ def display_recipe_detail(recipe: Recipe):
         st.markdown("## 🥘 Ingredients")
         if recipe.ingredients:
             ingredients_text = []
-            for i, (ingredient, measure) in enumerate(zip(recipe.ingredients, recipe.measures)):
+            for ingredient, measure in zip(recipe.ingredients, recipe.measures):
                 if ingredient:
                     if measure:
                         ingredients_text.append(f"• {ingredient}: {measure}")
                     else:
                         ingredients_text.append(f"• {ingredient}")
             
-            for text in ingredients_text:
-                st.markdown(text)
+            st.markdown("\n\n".join(ingredients_text))
         else:
             st.markdown("No ingredients information available")
     
@@ -272,17 +196,16 @@ def display_recipe_detail(recipe: Recipe):
         # Instructions section
         st.markdown("## 📝 Instructions")
         if recipe.instructions:
-            steps = recipe.instructions.split('\r\n')
-            for i, step in enumerate(steps, 1):
-                if step.strip():
-                    st.markdown(f"**Step {i}:** {step.strip()}")
+            st.markdown("\n\n".join(
+                f"**Step {i}:** {step}" for i, step in enumerate(_split_steps(recipe.instructions), 1)
+            ))
         else:
             st.markdown("No detailed instructions available")
 
 def render_recipe_count():
     """Render recipe count below main header"""
     try:
-        recipe_count = data_service.get_recipe_count()
+        recipe_count = _cached_recipe_count()
         st.markdown(f"<p style='text-align: center; color: #7f8c8d; margin-top: -1rem;'>{recipe_count} recipes available</p>", unsafe_allow_html=True)
     except:
         pass
@@ -314,8 +237,8 @@ def render_search_section():
     with col2:
         search_type = st.selectbox(
             "Search by",
-            ["All", "Name", "Ingredient", "Category", "Area"],
-            index=["All", "Name", "Ingredient", "Category", "Area"].index(saved_type) if saved_type in ["All", "Name", "Ingredient", "Category", "Area"] else 0,
+            SEARCH_TYPES,
+            index=SEARCH_TYPE_INDEX.get(saved_type, 0),
             key="search_type"
         )
     
@@ -330,15 +253,66 @@ def render_search_section():
     
     return search_query, search_type, num_results, search_clicked
 
+def render_search_results(search_query: str, search_type: str, num_results: int):
+    """Render the results grid for a search"""
+    st.markdown(f"### 🔍 Search Results for '{search_query}'")
+    
+    try:
+        recipes = _cached_search(search_query, SEARCH_TYPE_MAP[search_type], num_results)
+        
+        if recipes:
+            render_recipe_grid(recipes)
+        else:
+            st.warning("No related recipes found, please try other keywords")
+            
+    except Exception as e:
+        st.error(f"Search failed: {e}")
+
+@st.fragment
+def render_main_content():
+    """Render the search controls and results; widget changes rerun only this fragment"""
+    # Search section
+    search_query, search_type, num_results, search_clicked = render_search_section()
+    
+    # Main content area
+    if search_clicked and search_query.strip():
+        # Save search state to session with different variable names
+        st.session_state.saved_search_query = search_query
+        st.session_state.saved_search_type = search_type
+        st.session_state.saved_num_results = num_results
+        
+        render_search_results(search_query, search_type, num_results)
+    
+    elif st.session_state.get('saved_search_query'):
+        # Show previous search results
+        render_search_results(
+            st.session_state.saved_search_query,
+            st.session_state.saved_search_type,
+            st.session_state.saved_num_results
+        )
+    
+    else:
+        # Default view - show featured recipes
+        st.markdown("### 🌟 Featured Recipes")
+        try:
+            sample_recipes = _cached_random_recipes(6)
+            if sample_recipes:
+                render_recipe_grid(sample_recipes)
+            else:
+                st.info("No recipe data available, please run the data sync script first")
+        except Exception as e:
+            st.error(f"Failed to load sample recipes: {e}")
+
 def main():
     """Main application function"""
     # Initialize app
     try:
-        db_manager.create_tables()
-        logger.info("Database initialization completed")
+        _init_db()
         
-        recipe_count = data_service.get_recipe_count()
+        recipe_count = _cached_recipe_count()
         if recipe_count == 0:
+            # Don't keep the zero cached, so the app picks up data as soon as a sync adds it
+            _cached_recipe_count.clear()
             st.error("⚠️ No recipe data found in database!")
             st.info("Please run the data sync script first: `python scripts/sync/quick_sync.py`")
             st.stop()
@@ -350,11 +324,14 @@ def main():
         st.error("Database initialization failed, please check database connection configuration")
         st.stop()
     
+    # Card links navigate with query params
+    apply_query_params()
+    
     # Check if we're viewing a specific recipe detail
     selected_recipe_id = st.session_state.get('selected_recipe_id')
     if selected_recipe_id:
         try:
-            recipe = data_service.get_recipe_by_id(selected_recipe_id)
+            recipe = _cached_recipe(selected_recipe_id)
             if recipe:
                 display_recipe_detail(recipe)
                 return
@@ -367,11 +344,6 @@ def main():
             st.session_state.selected_recipe_id = None
             st.rerun()
     
-    # Store search state to maintain it after returning from detail view
-    search_query = st.session_state.get('saved_search_query', '')
-    search_type = st.session_state.get('saved_search_type', 'all')
-    num_results = st.session_state.get('saved_num_results', 6)
-    
     # Main header
     st.markdown("""
     <div class="main-header">
@@ -383,95 +355,8 @@ def main():
     # Recipe count below header
     render_recipe_count()
     
-    # Search section
-    search_query, search_type, num_results, search_clicked = render_search_section()
-    
-    # Main content area
-    if search_clicked and search_query.strip():
-        # Save search state to session with different variable names
-        st.session_state.saved_search_query = search_query
-        st.session_state.saved_search_type = search_type
-        st.session_state.saved_num_results = num_results
-        
-        # Search
-        st.markdown(f"### 🔍 Search Results for '{search_query}'")
-        
-        # Map search types
-        search_type_map = {
-            "All": "all",
-            "Name": "name", 
-            "Ingredient": "ingredient",
-            "Category": "category",
-            "Area": "area"
-        }
-        
-        with st.spinner("Searching recipes..."):
-            try:
-                recipes = recommendation_engine.search_and_recommend(
-                    search_query, 
-                    search_type_map[search_type], 
-                    num_results
-                )
-                
-                if recipes:
-                    cols = st.columns(3)
-                    for i, recipe in enumerate(recipes):
-                        display_modern_recipe_card(recipe, cols[i % 3])
-                else:
-                    st.warning("No related recipes found, please try other keywords")
-                    
-            except Exception as e:
-                st.error(f"Search failed: {e}")
-    
-    elif st.session_state.get('saved_search_query'):
-        # Show previous search results
-        search_query = st.session_state.saved_search_query
-        search_type = st.session_state.saved_search_type
-        num_results = st.session_state.saved_num_results
-        
-        st.markdown(f"### 🔍 Search Results for '{search_query}'")
-        
-        # Map search types
-        search_type_map = {
-            "All": "all",
-            "Name": "name", 
-            "Ingredient": "ingredient",
-            "Category": "category",
-            "Area": "area"
-        }
-        
-        with st.spinner("Loading search results..."):
-            try:
-                recipes = recommendation_engine.search_and_recommend(
-                    search_query, 
-                    search_type_map[search_type], 
-                    num_results
-                )
-                
-                if recipes:
-                    cols = st.columns(3)
-                    for i, recipe in enumerate(recipes):
-                        display_modern_recipe_card(recipe, cols[i % 3])
-                else:
-                    st.warning("No related recipes found, please try other keywords")
-                    
-            except Exception as e:
-                st.error(f"Search failed: {e}")
-    
-    else:
-        # Default view - show featured recipes
-        st.markdown("### 🌟 Featured Recipes")
-        try:
-            with st.spinner("Loading featured recipes..."):
-                sample_recipes = data_service.get_random_recipes(6)
-                if sample_recipes:
-                    cols = st.columns(3)
-                    for i, recipe in enumerate(sample_recipes):
-                        display_modern_recipe_card(recipe, cols[i % 3])
-                else:
-                    st.info("No recipe data available, please run the data sync script first")
-        except Exception as e:
-            st.error(f"Failed to load sample recipes: {e}")
+    # Search section and results
+    render_main_content()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -3,26 +3,34 @@
 Recipe Recommendation System Startup Script
 """
 
+import importlib.util
 import subprocess
 import sys
 import os
 
+# Modules the application imports, mapped to the package that provides them
+REQUIRED_MODULES = {
+    'streamlit': 'streamlit',
+    'requests': 'requests',
+    'psycopg2': 'psycopg2-binary',
+    'sqlalchemy': 'sqlalchemy',
+    'pandas': 'pandas',
+    'dotenv': 'python-dotenv',
+    'PIL': 'Pillow'
+}
+
 def check_dependencies():
-    """Check if dependencies are installed"""
-    try:
-        import streamlit
-        import requests
-        import psycopg2
-        import sqlalchemy
-        import pandas
-        from dotenv import load_dotenv
-        from PIL import Image
-        print("✅ All dependencies installed")
-        return True
-    except ImportError as e:
-        print(f"❌ Missing dependency: {e}")
+    """Check if dependencies are installed, without importing them"""
+    missing = [
+        package for module, package in REQUIRED_MODULES.items()
+        if importlib.util.find_spec(module) is None
+    ]
+    if missing:
+        print(f"❌ Missing dependency: {', '.join(missing)}")
         print("Please run: pip install -r requirements.txt")
         return False
+    print("✅ All dependencies installed")
+    return True
 
 def check_database_connection():
     """Check database connection"""
@@ -3,27 +3,25 @@
 Recipe Recommendation System One-Click Setup Script
 """
 
-import subprocess
 import sys
 import os
 
-def run_command(command, description):
-    """Run command and display results"""
+# Add project root to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from run import check_dependencies
+
+def run_step(step, description):
+    """Run a setup step in-process and display results"""
     print(f"🔧 {description}...")
     try:
-        result = subprocess.run(command, shell=True, capture_output=True, text=True)
-        if result.returncode == 0:
-            print(f"✅ {description} successful")
-            if result.stdout:
-                print(f"   Output: {result.stdout.strip()}")
-        else:
+        if step() is False:
             print(f"❌ {description} failed")
-            if result.stderr:
-                print(f"   Error: {result.stderr.strip()}")
             return False
     except Exception as e:
         print(f"❌ {description} failed: {e}")
         return False
+    print(f"✅ {description} successful")
     return True
 
 def main():
@@ -33,60 +31,50 @@ def main():
     
     # Check dependencies
     print("📦 Checking dependencies...")
-    try:
-        import streamlit
-        import requests
-        import psycopg2
-        import sqlalchemy
-        import pandas
-        from dotenv import load_dotenv
-        from PIL import Image
-        print("✅ All dependencies installed")
-    except ImportError as e:
-        print(f"❌ Missing dependency: {e}")
-        print("Please run: pip install -r requirements.txt")
+    if not check_dependencies():
         sys.exit(1)
     
+    # Imported after the dependency check since they need SQLAlchemy and the database driver
+    from backend.core.models import db_manager
+    from backend.services.data_service import data_service
+    from scripts.sync import quick_sync
+    
     # Check database connection
     print("\n🗄️ Checking database connection...")
-    if not run_command("python -c \"from backend.core.models import db_manager; print('OK' if db_manager.test_connection() else 'FAIL')\"", "Database connection test"):
+    if not run_step(db_manager.test_connection, "Database connection test"):
         print("❌ Database connection failed, please check configuration")
         sys.exit(1)
     
     # Initialize database
     print("\n🏗️ Initializing database...")
-    if not run_command("python -c \"from backend.core.models import db_manager; db_manager.create_tables(); print('OK')\"", "Create database tables"):
+    if not run_step(db_manager.create_tables, "Create database tables"):
         print("❌ Database initialization failed")
         sys.exit(1)
     
     # Check existing data
     print("\n📊 Checking existing data...")
-    result = subprocess.run("python -c \"from backend.services.data_service import data_service; print(data_service.get_recipe_count())\"", 
-                          shell=True, capture_output=True, text=True)
-    if result.returncode == 0:
-        # Extract just the number from the output
-        output_lines = result.stdout.strip().split('\n')
-        for line in output_lines:
-            if line.isdigit():
-                current_count = int(line)
-                break
-        else:
-            current_count = 0
-        print(f"Current database has {current_count} recipes")
+    try:
+        current_count = data_service.get_recipe_count()
+    except Exception as e:
+        print(f"❌ Unable to check data status: {e}")
+        sys.exit(1)
+    print(f"Current database has {current_count} recipes")
+    
+    if current_count == 0:
+        print("\n🔄 Starting data sync...")
+        print("⚠️  This may take a few minutes, please be patient...")
         
-        if current_count == 0:
-            print("\n🔄 Starting data sync...")
-            print("⚠️  This may take a few minutes, please be patient...")
-            
-            # Run data sync
-            if not run_command("python scripts/sync/quick_sync.py", "Sync data"):
-                print("❌ Data sync failed")
-                sys.exit(1)
-        else:
-            print("✅ Database already has data, skipping sync")
+        def sync_data():
+            # quick_sync reports its own errors, so judge the result by the recipe count
+            quick_sync.main()
+            return data_service.get_recipe_count() > 0
+        
+        # Run data sync
+        if not run_step(sync_data, "Sync data"):
+            print("❌ Data sync failed")
+            sys.exit(1)
     else:
-        print("❌ Unable to check data status")
-        sys.exit(1)
+        print("✅ Database already has data, skipping sync")
     
     print("\n" + "=" * 50)
     print("🎉 Setup completed!")
@@ -0,0 +1,76 @@
+"""
+Sync loop shared by the category and area sync scripts
+"""
+
+import logging
+import random
+
+from backend.services.data_service import data_service
+from backend.api.client import api_client
+from backend.core.models import db_manager
+
+logger = logging.getLogger(__name__)
+
+def dimension_sync(count, dimensions, key, search_fn, sample_size, label, icon):
+    """Sync recipes from a random sample of categories or areas"""
+    # Randomly select which ones to sync
+    selected = random.sample(dimensions, min(sample_size, len(dimensions)))
+    
+    total_added = 0
+    total_skipped = 0
+    
+    # Fetch the selected lists concurrently instead of one request (and a pause) at a time
+    names = [dimension.get(key, '') for dimension in selected]
+    meals_by_name = search_fn([name for name in names if name])
+    
+    # Select and parse each list's recipes before opening the session
+    known_ids = data_service.get_stored_meal_ids()
+    parsed_by_name = {}
+    for name, meals in meals_by_name.items():
+        logger.info(f"{icon} Syncing {label}: {name}")
+        
+        try:
+            logger.info(f"   📄 Found {len(meals)} recipes")
+            
+            # Randomly select recipes
+            selected_meals = random.sample(meals, min(count // len(selected), len(meals)))
+            
+            # Skip meals already stored or queued from an earlier list without asking the database
+            new_meals = [meal for meal in selected_meals if meal.get('idMeal') not in known_ids]
+            prefiltered_count = len(selected_meals) - len(new_meals)
+            total_skipped += prefiltered_count
+            
+            # filter.php only returns id, name and thumbnail, so look up the full records
+            full_meals = api_client.get_meals_by_ids([meal.get('idMeal') for meal in new_meals])
+            if len(full_meals) < len(new_meals):
+                logger.warning(f"   ⚠️ Lookup failed for {len(new_meals) - len(full_meals)} recipes, leaving them for a later sync")
+            # Only fetched meals count as queued, so a later list can retry the failed lookups
+            known_ids.update(meal.get('idMeal') for meal in full_meals)
+            parsed_by_name[name] = (data_service.parse_meals(full_meals), prefiltered_count)
+            
+        except Exception as e:
+            logger.error(f"   ❌ {label.capitalize()} {name} sync failed: {e}")
+            continue
+    
+    # Store everything in one transaction, committed once at the end
+    try:
+        with db_manager.session_scope(commit=True) as session:
+            for name, (parsed_meals, prefiltered_count) in parsed_by_name.items():
+                try:
+                    # A savepoint per list keeps one failed insert from discarding the others
+                    with session.begin_nested():
+                        added_count, skipped_count = data_service.persist_meals(session, parsed_meals)
+                except Exception as e:
+                    logger.error(f"   ❌ {label.capitalize()} {name} error: {e}")
+                    continue
+                logger.info(
+                    f"   ✅ {label.capitalize()} {name} completed: "
+                    f"added {added_count}, skipped {skipped_count + prefiltered_count}"
+                )
+                total_added += added_count
+                total_skipped += skipped_count
+    except Exception as e:
+        logger.error(f"❌ Failed to store synced recipes: {e}")
+        total_added = total_skipped = 0
+    
+    return total_added, total_skipped
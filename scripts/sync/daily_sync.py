@@ -4,19 +4,32 @@ Daily Scheduled Sync Script - Automatically fetch new recipes from API and add t
 """
 
 import sys
+import os
 import time
 import logging
+import logging.handlers
 from datetime import datetime
-from data_service import data_service
-from api_client import api_client
-from database import db_manager, Recipe
+
+# Add project root to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
+
+from backend.services.data_service import data_service
+from backend.api.client import api_client
+from backend.core.models import db_manager
+from scripts.sync._common import dimension_sync
 
 # Setup logging
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Buffer log file writes; errors and interpreter exit flush the buffer
+file_handler = logging.FileHandler('daily_sync.log')
+file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
+    format=LOG_FORMAT,
+    force=True,
     handlers=[
-        logging.FileHandler('daily_sync.log'),
+        logging.handlers.MemoryHandler(capacity=1024, flushLevel=logging.ERROR, target=file_handler),
         logging.StreamHandler()
     ]
 )
@@ -30,24 +43,15 @@ def sync_new_recipes(daily_count=20):
     """
     logger.info(f"🔄 Starting daily sync, target count: {daily_count}")
     
-    # Get current recipe count in database
-    current_count = data_service.get_recipe_count()
-    logger.info(f"📊 Current database has {current_count} recipes")
-    
     # Sync new recipes
     try:
         added, skipped = data_service.sync_with_api(daily_count)
         logger.info(f"✅ Sync completed! Added {added} recipes, skipped {skipped} duplicate recipes")
-        
-        # Get count after sync
-        final_count = data_service.get_recipe_count()
-        logger.info(f"📈 Database now has {final_count} recipes (added {final_count - current_count})")
-        
-        return added, skipped, final_count - current_count
+        return added, skipped
         
     except Exception as e:
         logger.error(f"❌ Sync failed: {e}")
-        return 0, 0, 0
+        return 0, 0
 
 def sync_by_categories(daily_count=20):
     """
@@ -61,86 +65,15 @@ def sync_by_categories(daily_count=20):
         logger.info(f"📋 Found {len(categories)} categories")
     except Exception as e:
         logger.error(f"❌ Failed to get categories: {e}")
-        return 0, 0, 0
+        return 0, 0
     
-    current_count = data_service.get_recipe_count()
-    total_added = 0
-    total_skipped = 0
-    
-    # Randomly select several categories for sync
-    import random
-    selected_categories = random.sample(categories, min(3, len(categories)))
-    
-    for category in selected_categories:
-        category_name = category.get('strCategory', '')
-        if not category_name:
-            continue
-            
-        logger.info(f"📂 Syncing category: {category_name}")
-        
-        try:
-            # Get recipes for this category
-            meals = api_client.search_by_category(category_name)
-            logger.info(f"   📄 Found {len(meals)} recipes")
-            
-            # Randomly select some recipes
-            selected_meals = random.sample(meals, min(daily_count // len(selected_categories), len(meals)))
-            
-            # Store to database
-            session = db_manager.get_session()
-            added_count = 0
-            skipped_count = 0
-            
-            try:
-                for meal in selected_meals:
-                    parsed_meal = api_client.parse_meal_data(meal)
-                    
-                    # Check if already exists
-                    existing_recipe = session.query(Recipe).filter(
-                        Recipe.meal_id == parsed_meal['meal_id']
-                    ).first()
-                    
-                    if not existing_recipe:
-                        recipe = Recipe(
-                            meal_id=parsed_meal['meal_id'],
-                            name=parsed_meal['name'],
-                            category=parsed_meal['category'],
-                            area=parsed_meal['area'],
-                            instructions=parsed_meal['instructions'],
-                            image_url=parsed_meal['image_url'],
-                            youtube_url=parsed_meal['youtube_url'],
-                            ingredients=parsed_meal['ingredients'],
-                            measures=parsed_meal['measures'],
-                            tags=parsed_meal['tags']
-                        )
-                        session.add(recipe)
-                        added_count += 1
-                    else:
-                        skipped_count += 1
-                
-                session.commit()
-                logger.info(f"   ✅ Completed: added {added_count}, skipped {skipped_count}")
-                total_added += added_count
-                total_skipped += skipped_count
-                
-            except Exception as e:
-                session.rollback()
-                logger.error(f"   ❌ Error: {e}")
-            finally:
-                db_manager.close_session(session)
-            
-            # Avoid API limits
-            time.sleep(1)
-            
-        except Exception as e:
-            logger.error(f"   ❌ Category {category_name} sync failed: {e}")
-            continue
+    total_added, total_skipped = dimension_sync(
+        daily_count, categories, 'strCategory', api_client.search_by_categories, 3, 'category', '📂'
+    )
     
-    final_count = data_service.get_recipe_count()
     logger.info(f"📈 Category sync completed! Added {total_added} recipes, skipped {total_skipped} duplicates")
-    logger.info(f"📊 Database now has {final_count} recipes")
     
-    return total_added, total_skipped, final_count - current_count
+    return total_added, total_skipped
 
 def main():
     """Main function"""
@@ -168,17 +101,24 @@ def main():
         logger.error(f"❌ Database initialization failed: {e}")
         sys.exit(1)
     
+    # Count once before and once after the sync
+    current_count = data_service.get_recipe_count()
+    logger.info(f"📊 Current database has {current_count} recipes")
+    
     # Execute sync
     start_time = time.time()
     
     if sync_method == "category":
-        added, skipped, net_new = sync_by_categories(daily_count)
+        added, skipped = sync_by_categories(daily_count)
     else:
-        added, skipped, net_new = sync_new_recipes(daily_count)
+        added, skipped = sync_new_recipes(daily_count)
     
     end_time = time.time()
     duration = end_time - start_time
     
+    final_count = data_service.get_recipe_count()
+    net_new = final_count - current_count
+    
     # Record sync results
     logger.info("=" * 50)
     logger.info("📊 Sync result statistics:")
@@ -186,7 +126,7 @@ def main():
     logger.info(f"   ✅ Added recipes: {added}")
     logger.info(f"   ⏭️  Skipped duplicates: {skipped}")
     logger.info(f"   📈 Net growth: {net_new}")
-    logger.info(f"   📊 Current total: {data_service.get_recipe_count()}")
+    logger.info(f"   📊 Current total: {final_count}")
     logger.info("=" * 50)
     
     if added > 0:
@@ -4,31 +4,41 @@ Smart Scheduled Sync Script - Automatically adjust sync strategy based on databa
 """
 
 import sys
+import os
 import time
 import logging
-import random
+import logging.handlers
 from datetime import datetime, timedelta
-from data_service import data_service
-from api_client import api_client
-from database import db_manager, Recipe
+
+# Add project root to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
+
+from backend.services.data_service import data_service
+from backend.api.client import api_client
+from backend.core.models import db_manager
+from scripts.sync._common import dimension_sync
 
 # Setup logging
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Buffer log file writes; errors and interpreter exit flush the buffer
+file_handler = logging.FileHandler('smart_sync.log')
+file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
+    format=LOG_FORMAT,
+    force=True,
     handlers=[
-        logging.FileHandler('smart_sync.log'),
+        logging.handlers.MemoryHandler(capacity=1024, flushLevel=logging.ERROR, target=file_handler),
         logging.StreamHandler()
     ]
 )
 logger = logging.getLogger(__name__)
 
-def get_sync_strategy():
+def get_sync_strategy(current_count):
     """
     Determine sync strategy based on current database status
     """
-    current_count = data_service.get_recipe_count()
-    
     if current_count < 100:
         # Low data volume, use quick sync
         return "quick", 50
@@ -52,78 +62,7 @@ def category_sync(count):
     categories = api_client.get_categories()
     logger.info(f"📋 Found {len(categories)} categories")
     
-    # Randomly select categories
-    selected_categories = random.sample(categories, min(3, len(categories)))
-    
-    total_added = 0
-    total_skipped = 0
-    
-    for category in selected_categories:
-        category_name = category.get('strCategory', '')
-        if not category_name:
-            continue
-            
-        logger.info(f"📂 Syncing category: {category_name}")
-        
-        try:
-            # Get recipes for this category
-            meals = api_client.search_by_category(category_name)
-            logger.info(f"   📄 Found {len(meals)} recipes")
-            
-            # Randomly select recipes
-            selected_meals = random.sample(meals, min(count // len(selected_categories), len(meals)))
-            
-            # Store to database
-            session = db_manager.get_session()
-            added_count = 0
-            skipped_count = 0
-            
-            try:
-                for meal in selected_meals:
-                    parsed_meal = api_client.parse_meal_data(meal)
-                    
-                    # Check if already exists
-                    existing_recipe = session.query(Recipe).filter(
-                        Recipe.meal_id == parsed_meal['meal_id']
-                    ).first()
-                    
-                    if not existing_recipe:
-                        recipe = Recipe(
-                            meal_id=parsed_meal['meal_id'],
-                            name=parsed_meal['name'],
-                            category=parsed_meal['category'],
-                            area=parsed_meal['area'],
-                            instructions=parsed_meal['instructions'],
-                            image_url=parsed_meal['image_url'],
-                            youtube_url=parsed_meal['youtube_url'],
-                            ingredients=parsed_meal['ingredients'],
-                            measures=parsed_meal['measures'],
-                            tags=parsed_meal['tags']
-                        )
-                        session.add(recipe)
-                        added_count += 1
-                    else:
-                        skipped_count += 1
-                
-                session.commit()
-                logger.info(f"   ✅ Completed: added {added_count}, skipped {skipped_count}")
-                total_added += added_count
-                total_skipped += skipped_count
-                
-            except Exception as e:
-                session.rollback()
-                logger.error(f"   ❌ Error: {e}")
-            finally:
-                db_manager.close_session(session)
-            
-            # Avoid API limits
-            time.sleep(1)
-            
-        except Exception as e:
-            logger.error(f"   ❌ Category {category_name} sync failed: {e}")
-            continue
-    
-    return total_added, total_skipped
+    return dimension_sync(count, categories, 'strCategory', api_client.search_by_categories, 3, 'category', '📂')
 
 def area_sync(count):
     """Area sync - get recipes by area"""
@@ -133,78 +72,7 @@ def area_sync(count):
     areas = api_client.get_areas()
     logger.info(f"🌎 Found {len(areas)} areas")
     
-    # Randomly select areas
-    selected_areas = random.sample(areas, min(2, len(areas)))
-    
-    total_added = 0
-    total_skipped = 0
-    
-    for area in selected_areas:
-        area_name = area.get('strArea', '')
-        if not area_name:
-            continue
-            
-        logger.info(f"🌍 Syncing area: {area_name}")
-        
-        try:
-            # Get recipes for this area
-            meals = api_client.search_by_area(area_name)
-            logger.info(f"   📄 Found {len(meals)} recipes")
-            
-            # Randomly select recipes
-            selected_meals = random.sample(meals, min(count // len(selected_areas), len(meals)))
-            
-            # Store to database
-            session = db_manager.get_session()
-            added_count = 0
-            skipped_count = 0
-            
-            try:
-                for meal in selected_meals:
-                    parsed_meal = api_client.parse_meal_data(meal)
-                    
-                    # Check if already exists
-                    existing_recipe = session.query(Recipe).filter(
-                        Recipe.meal_id == parsed_meal['meal_id']
-                    ).first()
-                    
-                    if not existing_recipe:
-                        recipe = Recipe(
-                            meal_id=parsed_meal['meal_id'],
-                            name=parsed_meal['name'],
-                            category=parsed_meal['category'],
-                            area=parsed_meal['area'],
-                            instructions=parsed_meal['instructions'],
-                            image_url=parsed_meal['image_url'],
-                            youtube_url=parsed_meal['youtube_url'],
-                            ingredients=parsed_meal['ingredients'],
-                            measures=parsed_meal['measures'],
-                            tags=parsed_meal['tags']
-                        )
-                        session.add(recipe)
-                        added_count += 1
-                    else:
-                        skipped_count += 1
-                
-                session.commit()
-                logger.info(f"   ✅ Completed: added {added_count}, skipped {skipped_count}")
-                total_added += added_count
-                total_skipped += skipped_count
-                
-            except Exception as e:
-                session.rollback()
-                logger.error(f"   ❌ Error: {e}")
-            finally:
-                db_manager.close_session(session)
-            
-            # Avoid API limits
-            time.sleep(1)
-            
-        except Exception as e:
-            logger.error(f"   ❌ Area {area_name} sync failed: {e}")
-            continue
-    
-    return total_added, total_skipped
+    return dimension_sync(count, areas, 'strArea', api_client.search_by_areas, 2, 'area', '🌍')
 
 def main():
     """Main function"""
@@ -228,7 +96,7 @@ def main():
         strategy = sys.argv[1].lower()
         count = int(sys.argv[2]) if len(sys.argv) > 2 else 20
     else:
-        strategy, count = get_sync_strategy()
+        strategy, count = get_sync_strategy(current_count)
     
     logger.info(f"🎯 Sync strategy: {strategy}, target count: {count}")
     